@@ -0,0 +1,18 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def get_env_int(name: str, default: int) -> int:
+    """Reads a positive integer from the environment, falling back to the default if it is invalid"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        parsed = 0
+    if parsed < 1:
+        logger.warning(f"Invalid value for {name}: {value!r}. Using {default}.")
+        return default
+    return parsed
@@ -47,6 +47,23 @@ class BaseExecutor(ABC):
         """Processes the stdout to extract both regular output and the result object"""
         pass
 
+    def _create_code_file(self, code: str, inputs: Dict[str, Any], env_vars: Dict[str, str]) -> str:
+        """Writes the prepared code to a temporary file and returns its path"""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=self._get_file_extension()) as code_file:
+            code_file_path = code_file.name
+            prepared_code = self._prepare_code(code, inputs, env_vars)
+            with open(code_file_path, 'w') as f:
+                f.write(prepared_code)
+        return code_file_path
+
+    def _remove_code_file(self, code_file_path: str):
+        """Removes the code file once the execution has finished"""
+        os.remove(code_file_path)
+
+    def _get_execution_stats(self) -> Dict[str, Any]:
+        """Returns language specific statistics to include in the result"""
+        return {}
+
     def execute(self, code: str, dependencies: List[str] = None, inputs: Dict[str, Any] = None, env_vars: Dict[str, str] = None, execution_timeout: int = EXECUTION_TIMEOUT) -> Dict[str, Any]:
         """Executes the code and returns the result"""
         try:
@@ -54,11 +71,7 @@ class BaseExecutor(ABC):
             if not dependencies:
                 dependencies = self.get_dependencies(code)
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=self._get_file_extension()) as code_file:
-                code_file_path = code_file.name
-                prepared_code = self._prepare_code(code, inputs or {}, env_vars or {})
-                with open(code_file_path, 'w') as f:
-                    f.write(prepared_code)
+            code_file_path = self._create_code_file(code, inputs or {}, env_vars or {})
 
             if not dependencies:
                 logger.info("No dependencies detected. Executing code directly.")
@@ -67,14 +80,15 @@ class BaseExecutor(ABC):
                 logger.info(f"Dependencies found: {dependencies}. Using a virtual environment.")
                 result = self._execute_with_dependencies(code_file_path, dependencies, inputs or {}, env_vars or {}, execution_timeout)
 
-            os.remove(code_file_path)
+            self._remove_code_file(code_file_path)
             stdout, output_data = self._process_output(result.stdout)
 
             return {
                 "stdout": stdout,
                 "output": output_data,
                 "execution_time_seconds": time.time() - start_time,
-                "error": result.stderr if result.stderr else None
+                "error": result.stderr if result.stderr else None,
+                **self._get_execution_stats()
             }
 
         except subprocess.TimeoutExpired:
@@ -0,0 +1,178 @@
+import hashlib
+import hmac
+import importlib.util
+import logging
+import marshal
+import os
+import secrets
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+CODE_FILENAME = "<user_code>"
+CACHE_FILE_SUFFIX = ".avmc"
+MAC_SIZE = hashlib.sha256().digest_size
+
+
+class CachedCode(NamedTuple):
+    data: bytes
+    cache_hit: bool
+    compile_time: float
+
+
+class CodeCache:
+    """LRU cache of marshalled code objects, kept in memory and on disk.
+
+    Entries are keyed by the SHA-256 of the source and the interpreter's
+    cache tag, so an entry is only ever loaded by a matching Python. Each
+    entry starts with ``importlib.util.MAGIC_NUMBER`` to let the runner
+    reject bytecode written by a different interpreter, followed by the
+    length-prefixed source (for tracebacks) and the marshalled code object.
+
+    The executed code can write to the cache dir, so disk entries are
+    prefixed with an HMAC made with a key that only lives in this process.
+    Entries that fail the check are compiled again.
+    """
+
+    def __init__(self, cache_dir: str, max_memory_entries: int = 128, max_disk_entries: int = 512):
+        if max_memory_entries < 1 or max_disk_entries < 1:
+            raise ValueError("Code cache sizes must be at least 1")
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._metadata: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._mac_key = secrets.token_bytes(32)
+
+    def _key(self, code: str) -> str:
+        digest = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        return f"{digest}.{sys.implementation.cache_tag}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_FILE_SUFFIX)
+
+    def _mac(self, key: str, data: bytes) -> bytes:
+        # The key is signed too, so a valid entry cannot be copied over another one
+        return hmac.new(self._mac_key, key.encode("ascii") + b"\0" + data, hashlib.sha256).digest()
+
+    def memoize(self, code: str, name: str, compute: Callable[[str], Any]) -> Any:
+        """Returns ``compute(code)``, cached in memory under the source hash of the code"""
+        key = (self._key(code), name)
+        with self._lock:
+            if key in self._metadata:
+                self._metadata.move_to_end(key)
+                return self._metadata[key]
+
+        value = compute(code)
+        with self._lock:
+            self._metadata[key] = value
+            while len(self._metadata) > self.max_memory_entries:
+                self._metadata.popitem(last=False)
+        return value
+
+    def get_or_compile(self, code: str) -> CachedCode:
+        """Returns the cache entry for the code, compiling it on a miss"""
+        key = self._key(code)
+        path = self._path(key)
+
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+        if data is not None:
+            self._touch(path)
+            return CachedCode(data, True, 0.0)
+
+        data = self._read(key, path)
+        if data is not None:
+            self._remember(key, data)
+            self._touch(path)
+            return CachedCode(data, True, 0.0)
+
+        start_time = time.time()
+        code_object = compile(code, CODE_FILENAME, "exec", dont_inherit=True)
+        source = code.encode("utf-8")
+        data = importlib.util.MAGIC_NUMBER + struct.pack("<I", len(source)) + source + marshal.dumps(code_object)
+        compile_time = time.time() - start_time
+
+        self._remember(key, data)
+        try:
+            self._write(path, self._mac(key, data) + data)
+        except OSError as e:
+            logger.warning(f"Could not write to the code cache at {self.cache_dir}: {e}")
+        else:
+            self._evict(keep=path)
+        return CachedCode(data, False, compile_time)
+
+    def _remember(self, key: str, data: bytes):
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read(self, key: str, path: str):
+        try:
+            with open(path, "rb") as f:
+                signed_data = f.read()
+        except OSError:
+            return None
+        mac, data = signed_data[:MAC_SIZE], signed_data[MAC_SIZE:]
+        if not hmac.compare_digest(mac, self._mac(key, data)):
+            logger.warning(f"Ignoring code cache entry with an invalid signature: {path}")
+            return None
+        if not data.startswith(importlib.util.MAGIC_NUMBER):
+            return None
+        return data
+
+    def _write(self, path: str, data: bytes):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _touch(self, path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _evict(self, keep: str):
+        """Removes the least recently used files once the disk cache is over its limit, never ``keep``"""
+        try:
+            entries = [
+                entry for entry in os.scandir(self.cache_dir)
+                if entry.name.endswith(CACHE_FILE_SUFFIX) and entry.path != keep
+            ]
+        except OSError:
+            return
+        # The kept entry counts towards the limit
+        excess = len(entries) + 1 - self.max_disk_entries
+        if excess <= 0:
+            return
+
+        def mtime(entry):
+            try:
+                return entry.stat().st_mtime
+            except OSError:
+                return 0.0
+
+        entries.sort(key=mtime)
+        for entry in entries[:excess]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+        logger.info(f"Evicted {excess} entries from the code cache")
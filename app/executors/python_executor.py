@@ -4,8 +4,21 @@ import venv
 import subprocess
 import os
 import json
+import struct
+import tempfile
 from typing import List, Dict, Any
 from .base import BaseExecutor
+from .code_cache import CodeCache
+from ..config import get_env_int
+from ..serialization import RawJSON
+
+RUNNER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_runner.py")
+
+CODE_CACHE = CodeCache(
+    cache_dir=os.environ.get("AVM_CODE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "avm-code-cache")),
+    max_memory_entries=get_env_int("AVM_CODE_CACHE_MEMORY_ENTRIES", 128),
+    max_disk_entries=get_env_int("AVM_CODE_CACHE_DISK_ENTRIES", 512)
+)
 
 def get_pip_executable(venv_path: str) -> str:
     if sys.platform == "win32":
@@ -19,6 +32,10 @@ def get_python_executable(venv_path: str) -> str:
 
 class PythonExecutor(BaseExecutor):
     def get_dependencies(self, code: str) -> List[str]:
+        # Parsing is skipped for code that was already analyzed
+        return list(CODE_CACHE.memoize(code, "dependencies", self._find_dependencies))
+
+    def _find_dependencies(self, code: str) -> List[str]:
         tree = ast.parse(code)
         dependencies = set()
 
@@ -45,71 +62,72 @@ class PythonExecutor(BaseExecutor):
         return ".py"
 
     def _prepare_code(self, code: str, inputs: Dict[str, Any], env_vars: Dict[str, str]) -> str:
-        """Prepares the Python code by adding input and environment variables"""
-        
-        env_code = "\n".join([f"os.environ['{k}'] = '{v}'" for k, v in env_vars.items()])
-        if env_code:
-            code = f"import os\nimport json\nimport logging\nlogging.basicConfig(level=logging.ERROR)\n{env_code}\n{code}"
-        else:
-            code = f"import json\nimport logging\nlogging.basicConfig(level=logging.ERROR)\n{code}"
-
-        input_code = "\n".join([f"{k} = {repr(v)}" for k, v in inputs.items()])
-        if input_code:
-            code = f"{input_code}\n{code}"
-
-        code += """
-# Wrapper to manage the result
-result = None
-try:
-    if 'output' in locals():
-        result = output
-except Exception as e:
-    print(f'Error capturing result: {e}', file=sys.stderr)
-
-# Output in JSON format
-print('__RESULT_START__')
-print(json.dumps(result))
-print('__RESULT_END__')
-"""
+        """Returns the Python code to compile. Inputs and environment variables are injected at run time"""
         return code
 
+    def _create_code_file(self, code: str, inputs: Dict[str, Any], env_vars: Dict[str, str]) -> str:
+        """Compiles the code through the code cache.
+
+        The cache entry is piped to the runner, so no code file is written and
+        the returned path is the one the code sees as ``__file__``.
+        """
+        prepared_code = self._prepare_code(code, inputs, env_vars)
+        cached_code = CODE_CACHE.get_or_compile(prepared_code)
+        self._code_data = cached_code.data
+        self._execution_stats = {
+            "compile_time_seconds": cached_code.compile_time,
+            "code_cache_hit": cached_code.cache_hit
+        }
+        return os.path.join(tempfile.gettempdir(), "main.py")
+
+    def _remove_code_file(self, code_file_path: str):
+        # The code is only kept by the code cache
+        pass
+
+    def _get_execution_stats(self) -> Dict[str, Any]:
+        return getattr(self, "_execution_stats", {})
+
+    def _run_code(self, python_executable: str, code_file_path: str, inputs: Dict[str, Any], env_vars: Dict[str, str], execution_timeout: int) -> subprocess.CompletedProcess:
+        stdin = struct.pack("<Q", len(self._code_data)) + self._code_data + json.dumps(inputs).encode("utf-8")
+        fd, self._result_file_path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            result = subprocess.run(
+                [python_executable, RUNNER_PATH, os.path.dirname(code_file_path), self._result_file_path],
+                input=stdin,
+                capture_output=True,
+                timeout=execution_timeout,
+                env={**os.environ, **env_vars}
+            )
+        except BaseException:
+            os.remove(self._result_file_path)
+            raise
+        result.stdout = result.stdout.decode("utf-8", errors="replace")
+        result.stderr = result.stderr.decode("utf-8", errors="replace")
+        return result
+
     def _execute_directly(self, code_file_path: str, inputs: Dict[str, Any], env_vars: Dict[str, str], execution_timeout: int) -> subprocess.CompletedProcess:
-        return subprocess.run(
-            [sys.executable, code_file_path],
-            capture_output=True,
-            text=True,
-            timeout=execution_timeout,
-            env={**os.environ, **env_vars}
-        )
+        return self._run_code(sys.executable, code_file_path, inputs, env_vars, execution_timeout)
 
     def _execute_with_dependencies(self, code_file_path: str, dependencies: List[str], inputs: Dict[str, Any], env_vars: Dict[str, str], execution_timeout: int) -> subprocess.CompletedProcess:
-        venv_dir = os.path.join(os.path.dirname(code_file_path), "venv")
+        venv_dir = os.path.join(tempfile.gettempdir(), "venv")
         venv.create(venv_dir, with_pip=True)
         self.install_dependencies(dependencies, venv_dir)
-        
-        return subprocess.run(
-            [get_python_executable(venv_dir), code_file_path],
-            capture_output=True,
-            text=True,
-            timeout=execution_timeout,
-            env={**os.environ, **env_vars}
-        )
-
-    def _process_output(self, stdout: str) -> tuple[str, Dict[str, Any]]:
-        """Processes the stdout to extract both regular output and the result object"""
-        try:
-            parts = stdout.split('__RESULT_START__')
-            if len(parts) != 2:
-                return stdout, {}
 
-            normal_output = parts[0].strip()
-            result_part = parts[1].split('__RESULT_END__')[0].strip()
+        return self._run_code(get_python_executable(venv_dir), code_file_path, inputs, env_vars, execution_timeout)
 
-            try:
-                result_data = json.loads(result_part) if result_part else {}
-            except json.JSONDecodeError:
-                result_data = {}
-
-            return normal_output, result_data
-        except Exception:
-            return stdout, {} 
\ No newline at end of file
+    def _process_output(self, stdout: str) -> tuple[str, Any]:
+        """Processes the stdout and reads the result object written by the runner"""
+        try:
+            with open(self._result_file_path, "rb") as f:
+                result_data = f.read()
+            os.remove(self._result_file_path)
+        except (AttributeError, OSError):
+            return stdout, {}
+
+        # The runner only writes the result once the code has finished
+        if not result_data:
+            return stdout, {}
+
+        # The runner already encoded the result, pass it through without decoding it
+        return stdout.strip(), RawJSON(result_data)
@@ -0,0 +1,108 @@
+"""Runs a cached Python code object in a fresh interpreter.
+
+Usage: python python_runner.py <sys_path_dir> <result_file>
+
+Stdin carries the code cache entry, prefixed with its length as an
+unsigned 64-bit little-endian integer, followed by the inputs as a JSON
+object. The inputs are injected into the ``__main__`` module before the
+code runs. The entry is piped rather than read from the cache dir, which
+the executed code can write to. The ``output`` variable is written as
+JSON to the result file, so nothing the code prints can be mistaken for
+the result. It is encoded with orjson when the interpreter has it.
+
+This script is executed as a standalone program and must not import
+anything from the app package.
+"""
+import builtins
+import importlib.util
+import json
+import linecache
+import logging
+import marshal
+import os
+import struct
+import sys
+import traceback
+import types
+
+try:
+    import orjson
+except ImportError:  # e.g. in a virtual environment with user dependencies
+    orjson = None
+
+CODE_FILENAME = "<user_code>"
+
+
+def encode_result(result) -> bytes:
+    """Encodes the result with orjson, falling back to the standard library for values it rejects"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(result, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            pass
+    return json.dumps(result).encode("utf-8")
+
+
+def load_code(data: bytes):
+    """Loads a code cache entry and registers its source for tracebacks"""
+    magic = importlib.util.MAGIC_NUMBER
+    if not data.startswith(magic):
+        print("Cached code was compiled by a different Python version", file=sys.stderr)
+        sys.exit(1)
+
+    offset = len(magic)
+    (source_length,) = struct.unpack_from("<I", data, offset)
+    offset += 4
+    source = data[offset:offset + source_length].decode("utf-8")
+    code_object = marshal.loads(data[offset + source_length:])
+
+    # An mtime of None keeps linecache.checkcache from discarding the entry
+    linecache.cache[CODE_FILENAME] = (len(source), None, source.splitlines(True), CODE_FILENAME)
+    return code_object
+
+
+def main():
+    sys_path_dir, result_file_path = sys.argv[1], sys.argv[2]
+    # Keep the import path the user code saw when it ran from a temp file
+    sys.path[0] = sys_path_dir
+    del sys.argv[1:]
+
+    stdin = sys.stdin.buffer.read()
+    (code_length,) = struct.unpack_from("<Q", stdin)
+    code_object = load_code(stdin[8:8 + code_length])
+    raw_inputs = stdin[8 + code_length:]
+    del stdin
+    inputs = json.loads(raw_inputs) if raw_inputs else {}
+
+    logging.basicConfig(level=logging.ERROR)
+
+    # Run the code as the real __main__ module, like runpy does, so pickle
+    # and typing can resolve the classes it defines
+    module = types.ModuleType("__main__")
+    # Like the temp file the code used to run from, without exposing the cache
+    module.__file__ = os.path.join(sys_path_dir, "main.py")
+    module.__builtins__ = builtins
+    module.__dict__.update(inputs)
+    module.__dict__.update({"os": os, "json": json, "logging": logging})
+    sys.modules["__main__"] = module
+
+    try:
+        exec(code_object, module.__dict__)
+    except SystemExit:
+        raise
+    except BaseException as e:
+        # Drop the runner frame so the traceback starts in the user code
+        traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+        sys.exit(1)
+
+    # Wrapper to manage the result
+    result = module.__dict__.get("output")
+
+    # Output in JSON format
+    encoded = encode_result(result)
+    with open(result_file_path, "wb") as f:
+        f.write(encoded)
+
+
+if __name__ == "__main__":
+    main()
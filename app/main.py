@@ -1,7 +1,7 @@
 from .executors import get_executor
 from .executors.base import BaseExecutor
+from .serialization import get_serializer, encode_body, ResponseTooLargeError
 import logging
-import json
 import dotenv
 
 dotenv.load_dotenv()
@@ -15,7 +15,9 @@ logging.basicConfig(
     ]
 )
 
-def executor_handler(payload):
+serializer = get_serializer()
+
+def executor_handler(payload, accept_encoding=None):
     
     input_data = payload
     if not input_data:
@@ -37,13 +39,22 @@ def executor_handler(payload):
             env_vars=env_vars,
             execution_timeout=execution_timeout
         )
+        try:
+            encoded = encode_body(serializer.dumps_result(result), accept_encoding)
+            status_code = 200
+        except ResponseTooLargeError as e:
+            logger.error(str(e))
+            encoded = encode_body(serializer.dumps({"error": str(e)}))
+            status_code = 413
         response = {
-            "statusCode": 200,
+            "statusCode": status_code,
             "headers": {
                 "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*"
+                "Access-Control-Allow-Origin": "*",
+                **encoded["headers"]
             },
-            "body": json.dumps(result)
+            "body": encoded["body"],
+            "isBase64Encoded": encoded["isBase64Encoded"]
         }
         return response
     except ValueError as e:
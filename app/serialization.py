@@ -0,0 +1,191 @@
+import base64
+import gzip
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+from .config import get_env_int
+
+logger = logging.getLogger(__name__)
+
+# AWS Lambda rejects synchronous responses larger than 6 MB
+LAMBDA_RESPONSE_LIMIT_BYTES = 6 * 1024 * 1024
+# Room left for the status code, headers and JSON framing of the response
+RESPONSE_OVERHEAD_BYTES = 1024
+GZIP_MIN_BYTES = get_env_int("AVM_GZIP_MIN_BYTES", 64 * 1024)
+
+JSONDecodeError = json.JSONDecodeError
+ASCII_BYTES = bytes(range(128))
+# Integers with 19 or more digits may not fit in 64 bits
+BIG_INTEGER = re.compile(r"[0-9]{19}")
+BIG_INTEGER_BYTES = re.compile(rb"[0-9]{19}")
+
+
+class RawJSON:
+    """Already encoded JSON that is written to the response as is"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+class ResponseTooLargeError(ValueError):
+    pass
+
+
+class JsonSerializer:
+    """Standard library JSON codec"""
+
+    def loads(self, data) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def dumps_result(self, result: Dict[str, Any]) -> bytes:
+        """Encodes a result dict, splicing top level RawJSON values in without decoding them"""
+        parts = []
+        for key, value in result.items():
+            encoded = value.data if isinstance(value, RawJSON) else self.dumps(value)
+            parts.append(self.dumps(str(key)) + b":" + encoded)
+        return b"{" + b",".join(parts) + b"}"
+
+
+class OrjsonSerializer(JsonSerializer):
+    """orjson codec, falling back to the standard library for values orjson rejects"""
+
+    def __init__(self):
+        if orjson is None:
+            raise RuntimeError("orjson must be installed to use the orjson serializer")
+
+    def loads(self, data) -> Any:
+        is_text = isinstance(data, str)
+        if (BIG_INTEGER if is_text else BIG_INTEGER_BYTES).search(data):
+            # orjson turns integers over 64 bits into floats, the standard library keeps them exact
+            return super().loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError as e:
+            if not self._stdlib_may_accept(data, is_text, e):
+                raise
+            return super().loads(data)
+
+    def _stdlib_may_accept(self, data, is_text: bool, error) -> bool:
+        """Checks whether input orjson rejected is something the standard library accepts"""
+        if "surrogate" in error.msg or "infinity" in error.msg:
+            return True
+        if is_text:
+            return "NaN" in data or "Infinity" in data
+        return b"NaN" in data or b"Infinity" in data
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            return super().dumps(obj)
+
+
+SERIALIZERS = {
+    "json": JsonSerializer,
+    "orjson": OrjsonSerializer,
+}
+
+
+def get_serializer(name: Optional[str] = None):
+    """Returns the named serializer, or the fastest available one if no name is given.
+
+    An unusable AVM_SERIALIZER only logs a warning, so a bad setting cannot
+    break the handler.
+    """
+    default_name = "orjson" if orjson is not None else "json"
+    if not name:
+        name = os.environ.get("AVM_SERIALIZER")
+        if name and name.lower() not in SERIALIZERS:
+            logger.warning(f"Unsupported serializer in AVM_SERIALIZER: {name!r}. Using {default_name}.")
+            name = None
+        elif name and name.lower() == "orjson" and orjson is None:
+            logger.warning(f"AVM_SERIALIZER is orjson but orjson is not installed. Using {default_name}.")
+            name = None
+    name = name or default_name
+    serializer_class = SERIALIZERS.get(name.lower())
+    if not serializer_class:
+        raise ValueError(f"Unsupported serializer: {name}")
+    return serializer_class()
+
+
+def _parse_qvalue(params: str) -> float:
+    for param in params.split(";"):
+        key, _, value = param.strip().partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Checks whether an Accept-Encoding header value allows gzip.
+
+    An explicit ``gzip`` entry takes precedence over the ``*`` wildcard.
+    """
+    if not accept_encoding:
+        return False
+    qvalues = {}
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        qvalues[name.strip().lower()] = _parse_qvalue(params)
+    qvalue = qvalues.get("gzip", qvalues.get("*", 0.0))
+    return qvalue > 0
+
+
+def _estimated_response_size(body: bytes) -> int:
+    """Upper bound of the size of the body once embedded as a JSON string in the response"""
+    size = len(body) + body.count(b'"') + body.count(b"\\") + RESPONSE_OVERHEAD_BYTES
+    if not body.isascii():
+        # The runtime may escape non-ASCII characters as \uXXXX (or a surrogate pair),
+        # which is at most three times their UTF-8 length
+        size += 2 * len(body.translate(None, ASCII_BYTES))
+    return size
+
+
+def encode_body(body: bytes, accept_encoding: Optional[str] = None, gzip_min_bytes: int = GZIP_MIN_BYTES) -> Dict[str, Any]:
+    """Builds the body related fields of a Lambda proxy response.
+
+    Bodies of at least ``gzip_min_bytes`` are gzip-compressed when the client
+    accepts it. Raises ResponseTooLargeError if the body would not fit in a
+    Lambda response.
+    """
+    uncompressed_size = len(body)
+    if uncompressed_size >= gzip_min_bytes and accepts_gzip(accept_encoding):
+        encoded = base64.b64encode(gzip.compress(body, compresslevel=6))
+        if len(encoded) + RESPONSE_OVERHEAD_BYTES > LAMBDA_RESPONSE_LIMIT_BYTES:
+            raise ResponseTooLargeError(
+                f"Response body is {uncompressed_size} bytes ({len(encoded)} bytes gzip-compressed), "
+                f"which exceeds the Lambda response limit of {LAMBDA_RESPONSE_LIMIT_BYTES} bytes"
+            )
+        return {
+            "headers": {"Content-Encoding": "gzip"},
+            "body": encoded.decode("ascii"),
+            "isBase64Encoded": True
+        }
+
+    if _estimated_response_size(body) > LAMBDA_RESPONSE_LIMIT_BYTES:
+        hint = "" if accepts_gzip(accept_encoding) else " Send 'Accept-Encoding: gzip' to receive a compressed response."
+        raise ResponseTooLargeError(
+            f"Response body is {uncompressed_size} bytes, which exceeds the Lambda response limit "
+            f"of {LAMBDA_RESPONSE_LIMIT_BYTES} bytes.{hint}"
+        )
+    return {
+        "headers": {},
+        "body": body.decode("utf-8"),
+        "isBase64Encoded": False
+    }
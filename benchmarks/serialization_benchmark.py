@@ -0,0 +1,84 @@
+"""Micro-benchmark of the response serializer paths.
+
+Every path starts from the Python result object in the runner and ends with
+the response body, for 1 KB, 1 MB and 20 MB result payloads:
+
+- runner encode: the runner encoding the result on its own, for reference
+- stdlib: the previous path, json.dumps in the runner, json.loads of its
+  output and json.dumps of the result
+- <serializer>: runner encode, then decode and re-encode with each available serializer
+- <serializer> passthrough: runner encode, then splice its output in as RawJSON
+- stdlib runner passthrough: passthrough when the runner has no orjson, e.g. in a venv
+- gzip: passthrough plus gzip/base64 encoding of the body
+
+Usage: python benchmarks/serialization_benchmark.py [repeats]
+"""
+import base64
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.executors.python_runner import encode_result  # noqa: E402
+from app.serialization import SERIALIZERS, RawJSON, get_serializer  # noqa: E402
+
+PAYLOAD_SIZES = {
+    "1 KB": 1024,
+    "1 MB": 1024 * 1024,
+    "20 MB": 20 * 1024 * 1024,
+}
+
+
+def make_output(size: int):
+    """Builds a result object of roughly the given size once encoded"""
+    row = {"id": 123456, "name": "avm-executor", "score": 0.98765, "tags": ["a", "b", "c"], "active": True}
+    row_size = len(json.dumps(row)) + 2
+    # Distinct rows, so encoders cannot benefit from repeated objects
+    return {"rows": [dict(row, id=i) for i in range(max(1, size // row_size))]}
+
+
+def make_result(output) -> dict:
+    return {"stdout": "", "output": output, "execution_time_seconds": 0.1, "error": None}
+
+
+def timed(func, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    serializers = {}
+    for name in SERIALIZERS:
+        try:
+            serializers[name] = get_serializer(name)
+        except RuntimeError:
+            print(f"Skipping unavailable serializer: {name}")
+
+    print(f"{'payload':>8}  {'path':<26} {'best (ms)':>10}")
+    for label, size in PAYLOAD_SIZES.items():
+        output = make_output(size)
+        paths = {
+            "runner encode": lambda: encode_result(output),
+            "stdlib": lambda: json.dumps(make_result(json.loads(json.dumps(output)))),
+        }
+        for name, serializer in serializers.items():
+            paths[name] = lambda s=serializer: s.dumps_result(make_result(s.loads(encode_result(output))))
+            paths[f"{name} passthrough"] = lambda s=serializer: s.dumps_result(make_result(RawJSON(encode_result(output))))
+        fastest = get_serializer()
+        paths["stdlib runner passthrough"] = lambda: fastest.dumps_result(make_result(RawJSON(json.dumps(output).encode("utf-8"))))
+        paths["gzip"] = lambda: base64.b64encode(gzip.compress(fastest.dumps_result(make_result(RawJSON(encode_result(output)))), compresslevel=6))
+
+        for path, func in paths.items():
+            print(f"{label:>8}  {path:<26} {timed(func, repeats) * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,39 @@
-import json
 from app.main import executor_handler
+from app.serialization import get_serializer, JSONDecodeError
+
+serializer = get_serializer()
+
+def _get_accept_encoding(event):
+    headers = event.get("headers")
+    if not isinstance(headers, dict):
+        return None
+    for key, value in headers.items():
+        if key.lower() == "accept-encoding":
+            return value
+    return None
 
 def handler(event, context):
     # If event is a string, try to parse it as JSON
     if isinstance(event, str):
         try:
-            event = json.loads(event)
-        except json.JSONDecodeError:
+            event = serializer.loads(event)
+        except JSONDecodeError:
             # If parsing fails, use the string as is
             return executor_handler(event)
-    
+
     # If event is a dict and has a body field, parse the body as JSON
     if isinstance(event, dict) and "body" in event:
+        accept_encoding = _get_accept_encoding(event)
         try:
             # The body is a JSON string that needs to be parsed
-            body = json.loads(event["body"])
-            return executor_handler(body)
-        except json.JSONDecodeError:
+            body = serializer.loads(event["body"])
+            return executor_handler(body, accept_encoding)
+        except JSONDecodeError:
             # If body parsing fails, use empty dict
-            return executor_handler({})
+            return executor_handler({}, accept_encoding)
     elif isinstance(event, dict):
         # If it's a dict but no body field, use the event directly
         return executor_handler(event)
     else:
         # For any other type, use as is
-        return executor_handler(event)
\ No newline at end of file
+        return executor_handler(event)
@@ -0,0 +1,178 @@
+import json
+import os
+
+import pytest
+
+from app.executors import python_executor
+from app.executors.code_cache import CodeCache, CACHE_FILE_SUFFIX
+from app.executors.python_executor import PythonExecutor
+
+
+def cache_files(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(CACHE_FILE_SUFFIX))
+
+
+def compile_new(cache, cache_dir, code):
+    """Compiles the code and returns the path of the disk entry it created"""
+    before = set(cache_files(cache_dir))
+    cache.get_or_compile(code)
+    (name,) = set(cache_files(cache_dir)) - before
+    return os.path.join(cache_dir, name)
+
+
+def test_compiles_on_miss_and_hits_memory_then_disk(tmp_path):
+    cache = CodeCache(str(tmp_path), max_memory_entries=1)
+    miss = cache.get_or_compile("output = 1")
+    assert not miss.cache_hit
+    assert len(cache_files(tmp_path)) == 1
+
+    memory_hit = cache.get_or_compile("output = 1")
+    assert memory_hit.cache_hit
+    assert memory_hit.compile_time == 0.0
+    assert memory_hit.data == miss.data
+
+    cache.get_or_compile("output = 2")
+    disk_hit = cache.get_or_compile("output = 1")
+    assert disk_hit.cache_hit
+    assert disk_hit.data == miss.data
+
+
+def test_memory_hit_does_not_need_the_disk_entry(tmp_path):
+    cache = CodeCache(str(tmp_path))
+    path = compile_new(cache, str(tmp_path), "output = 1")
+    os.remove(path)
+
+    assert cache.get_or_compile("output = 1").cache_hit
+
+
+def test_memory_lru_eviction(tmp_path):
+    cache = CodeCache(str(tmp_path), max_memory_entries=2)
+    a = compile_new(cache, str(tmp_path), "a = 1")
+    b = compile_new(cache, str(tmp_path), "b = 1")
+    cache.get_or_compile("a = 1")
+    cache.get_or_compile("c = 1")
+    # Without the disk entries, only the entries still in memory are hits
+    os.remove(a)
+    os.remove(b)
+
+    assert cache.get_or_compile("a = 1").cache_hit
+    assert not cache.get_or_compile("b = 1").cache_hit
+
+
+def test_disk_lru_eviction_keeps_recent_entries(tmp_path):
+    cache = CodeCache(str(tmp_path), max_disk_entries=2)
+    a = compile_new(cache, str(tmp_path), "a = 1")
+    os.utime(a, (1, 1))
+    b = compile_new(cache, str(tmp_path), "b = 1")
+    os.utime(b, (2, 2))
+    c = compile_new(cache, str(tmp_path), "c = 1")
+
+    assert cache_files(tmp_path) == sorted(os.path.basename(path) for path in (b, c))
+
+
+def test_disk_eviction_never_removes_the_new_entry(tmp_path):
+    cache = CodeCache(str(tmp_path), max_disk_entries=1)
+    cache.get_or_compile("a = 1")
+    path = compile_new(cache, str(tmp_path), "b = 1")
+
+    assert cache_files(tmp_path) == [os.path.basename(path)]
+
+
+def test_rejects_tampered_disk_entries(tmp_path):
+    cache = CodeCache(str(tmp_path), max_memory_entries=1)
+    victim = compile_new(cache, str(tmp_path), "output = 1")
+    other = compile_new(cache, str(tmp_path), "output = 2")
+
+    # A validly signed entry copied over another one is rejected as well
+    os.replace(other, victim)
+    cached_code = cache.get_or_compile("output = 1")
+    assert not cached_code.cache_hit
+
+    with open(victim, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)[0]
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last ^ 0xFF]))
+    cache.get_or_compile("output = 2")
+    recompiled = cache.get_or_compile("output = 1")
+    assert not recompiled.cache_hit
+    assert recompiled.data == cached_code.data
+
+
+def test_disk_entries_are_not_trusted_by_other_processes(tmp_path):
+    CodeCache(str(tmp_path)).get_or_compile("output = 1")
+
+    assert not CodeCache(str(tmp_path)).get_or_compile("output = 1").cache_hit
+
+
+def test_keeps_working_when_the_cache_dir_is_not_writable(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    cache = CodeCache(str(blocker / "cache"))
+
+    assert not cache.get_or_compile("output = 1").cache_hit
+    assert cache.get_or_compile("output = 1").cache_hit
+
+
+def test_rejects_invalid_sizes(tmp_path):
+    with pytest.raises(ValueError):
+        CodeCache(str(tmp_path), max_disk_entries=0)
+
+
+def test_memoize_computes_once_per_source(tmp_path):
+    cache = CodeCache(str(tmp_path))
+    calls = []
+
+    def compute(code):
+        calls.append(code)
+        return len(code)
+
+    assert cache.memoize("abc", "length", compute) == 3
+    assert cache.memoize("abc", "length", compute) == 3
+    assert calls == ["abc"]
+
+
+def test_executor_reuses_compiled_code_across_inputs(tmp_path, monkeypatch):
+    monkeypatch.setattr(python_executor, "CODE_CACHE", CodeCache(str(tmp_path)))
+    code = "output = {'sum': a + b}"
+
+    first = PythonExecutor().execute(code, inputs={"a": 1, "b": 2})
+    second = PythonExecutor().execute(code, inputs={"a": 10, "b": 20})
+
+    assert first["code_cache_hit"] is False
+    assert second["code_cache_hit"] is True
+    assert second["compile_time_seconds"] == 0.0
+    assert json.loads(first["output"].data) == {"sum": 3}
+    assert json.loads(second["output"].data) == {"sum": 30}
+
+
+def test_executor_ignores_cache_entries_replaced_by_executed_code(tmp_path, monkeypatch):
+    monkeypatch.setattr(python_executor, "CODE_CACHE", CodeCache(str(tmp_path), max_memory_entries=1))
+    victim = "output = {'key': os.environ['API_KEY'][:0]}"
+    assert json.loads(PythonExecutor().execute(victim, env_vars={"API_KEY": "s3cr3t"})["output"].data) == {"key": ""}
+
+    attack = (
+        "import glob, marshal, importlib.util, struct\n"
+        "source = b\"output = {'stolen': os.environ['API_KEY']}\"\n"
+        "data = importlib.util.MAGIC_NUMBER + struct.pack('<I', len(source)) + source\n"
+        "data += marshal.dumps(compile(source, '<user_code>', 'exec'))\n"
+        f"for path in glob.glob({str(tmp_path)!r} + '/*{CACHE_FILE_SUFFIX}'):\n"
+        "    with open(path, 'wb') as f:\n"
+        "        f.write(b'\\0' * 32 + data)\n"
+    )
+    assert PythonExecutor().execute(attack)["error"] is None
+
+    # Once from disk after the attack evicted the victim from memory, once from memory
+    for _ in range(2):
+        result = PythonExecutor().execute(victim, env_vars={"API_KEY": "s3cr3t"})
+        assert json.loads(result["output"].data) == {"key": ""}
+
+
+def test_executor_ignores_result_markers_printed_by_the_code(tmp_path, monkeypatch):
+    monkeypatch.setattr(python_executor, "CODE_CACHE", CodeCache(str(tmp_path)))
+    code = "import sys\nprint('x')\nprint('__RESULT_START__\\nnot json\\n__RESULT_END__')\nsys.exit(0)"
+
+    result = PythonExecutor().execute(code)
+
+    assert result["output"] == {}
+    assert "not json" in result["stdout"]
@@ -0,0 +1,17 @@
+import pytest
+
+from app.config import get_env_int
+
+
+@pytest.mark.parametrize("value, expected", [
+    (None, 10),
+    ("64", 64),
+    ("64k", 10),
+    ("0", 10),
+    ("-1", 10),
+])
+def test_get_env_int(monkeypatch, value, expected):
+    if value is not None:
+        monkeypatch.setenv("AVM_TEST_INT", value)
+
+    assert get_env_int("AVM_TEST_INT", 10) == expected
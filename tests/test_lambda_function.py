@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+pytest.importorskip("dotenv")
+
+import lambda_function  # noqa: E402
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def executor_handler(payload, accept_encoding=None):
+        calls.append((payload, accept_encoding))
+
+    monkeypatch.setattr(lambda_function, "executor_handler", executor_handler)
+    return calls
+
+
+@pytest.mark.parametrize("header", ["Accept-Encoding", "accept-encoding", "ACCEPT-ENCODING"])
+def test_accept_encoding_header_is_case_insensitive(calls, header):
+    lambda_function.handler({"headers": {header: "gzip"}, "body": json.dumps({"code": "x = 1"})}, None)
+
+    assert calls == [({"code": "x = 1"}, "gzip")]
+
+
+def test_missing_or_invalid_headers(calls):
+    lambda_function.handler({"headers": None, "body": "{}"}, None)
+    lambda_function.handler({"body": "not json"}, None)
+
+    assert calls == [({}, None), ({}, None)]
+
+
+def test_direct_invocation_ignores_headers_in_the_payload(calls):
+    payload = {"code": "x = 1", "headers": {"Accept-Encoding": "gzip"}}
+    lambda_function.handler(payload, None)
+
+    assert calls == [(payload, None)]
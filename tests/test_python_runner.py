@@ -0,0 +1,107 @@
+import json
+import struct
+import subprocess
+import sys
+
+import pytest
+
+from app.executors.code_cache import CodeCache
+from app.executors.python_executor import RUNNER_PATH
+from app.executors.python_runner import encode_result
+
+
+def run_entry(tmp_path, data, inputs=None):
+    stdin = struct.pack("<Q", len(data)) + data + json.dumps(inputs or {}).encode()
+    (tmp_path / "result.json").write_text("")
+    result = subprocess.run(
+        [sys.executable, RUNNER_PATH, str(tmp_path), str(tmp_path / "result.json")],
+        input=stdin,
+        capture_output=True,
+        timeout=60
+    )
+    result.stdout = result.stdout.decode()
+    result.stderr = result.stderr.decode()
+    return result
+
+
+def run(tmp_path, code, inputs=None):
+    data = CodeCache(str(tmp_path / "cache")).get_or_compile(code).data
+    return run_entry(tmp_path, data, inputs)
+
+
+def result_of(tmp_path):
+    return json.loads((tmp_path / "result.json").read_text())
+
+
+def test_inputs_and_output_round_trip(tmp_path):
+    result = run(tmp_path, "print(a)\noutput = {'sum': a + b, 'env': os.name}", {"a": 1, "b": 2})
+
+    assert result.returncode == 0
+    assert result.stdout.startswith("1\n")
+    assert result_of(tmp_path) == {"sum": 3, "env": "posix"}
+
+
+def test_missing_output_is_null(tmp_path):
+    result = run(tmp_path, "x = 1")
+
+    assert result_of(tmp_path) is None
+
+
+def test_code_runs_as_the_main_module(tmp_path):
+    code = (
+        "import pickle, typing\n"
+        "class Node:\n"
+        "    next: 'Node'\n"
+        "output = {\n"
+        "    'pickled': pickle.loads(pickle.dumps(Node())).__class__.__name__,\n"
+        "    'hints': str(typing.get_type_hints(Node)),\n"
+        "    'name': __name__,\n"
+        "    'file': __file__,\n"
+        "}\n"
+    )
+    result = run(tmp_path, code)
+
+    assert result.stderr == ""
+    assert result_of(tmp_path) == {
+        "pickled": "Node",
+        "hints": "{'next': <class '__main__.Node'>}",
+        "name": "__main__",
+        "file": str(tmp_path / "main.py"),
+    }
+
+
+def test_traceback_shows_user_source_without_runner_frames(tmp_path):
+    result = run(tmp_path, "x = 1\nraise ValueError('boom')")
+
+    assert result.returncode == 1
+    assert (tmp_path / "result.json").read_text() == ""
+    assert "python_runner.py" not in result.stderr
+    assert 'File "<user_code>", line 2, in <module>' in result.stderr
+    assert "raise ValueError('boom')" in result.stderr
+    assert result.stderr.strip().endswith("ValueError: boom")
+
+
+def test_rejects_code_from_a_different_python(tmp_path):
+    data = CodeCache(str(tmp_path / "cache")).get_or_compile("output = 1").data
+
+    result = run_entry(tmp_path, b"\x00\x00\x00\x00" + data[4:])
+
+    assert result.returncode == 1
+    assert "different Python version" in result.stderr
+
+
+def test_printed_markers_are_not_mistaken_for_the_result(tmp_path):
+    result = run(tmp_path, "print('__RESULT_START__')\nprint('not json')\nprint('__RESULT_END__')\noutput = [1]")
+
+    assert "not json" in result.stdout
+    assert result_of(tmp_path) == [1]
+
+
+@pytest.mark.parametrize("result", [
+    {"rows": [1, 2.5, "é", None, True]},
+    {1: "int key"},
+    {"big": 2 ** 70},
+    None,
+])
+def test_encode_result_matches_the_standard_library(result):
+    assert json.loads(encode_result(result)) == json.loads(json.dumps(result))
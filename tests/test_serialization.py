@@ -0,0 +1,141 @@
+import base64
+import gzip
+import json
+import math
+import os
+
+import pytest
+
+from app.serialization import (
+    LAMBDA_RESPONSE_LIMIT_BYTES,
+    RESPONSE_OVERHEAD_BYTES,
+    SERIALIZERS,
+    RawJSON,
+    ResponseTooLargeError,
+    accepts_gzip,
+    encode_body,
+    get_serializer,
+)
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, False),
+    ("", False),
+    ("gzip", True),
+    ("GZIP", True),
+    ("br, gzip;q=0.5", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0", False),
+    ("gzip;q=invalid", False),
+    ("br", False),
+    ("*", True),
+    ("*;q=0", False),
+    ("*;q=0, gzip", True),
+    ("gzip;q=0, *", False),
+])
+def test_accepts_gzip(accept_encoding, expected):
+    assert accepts_gzip(accept_encoding) is expected
+
+
+def test_encode_body_leaves_small_bodies_uncompressed():
+    encoded = encode_body(b'{"a":1}', "gzip", gzip_min_bytes=100)
+
+    assert encoded == {"headers": {}, "body": '{"a":1}', "isBase64Encoded": False}
+
+
+def test_encode_body_compresses_from_the_threshold():
+    body = b"[" + b"1," * 49 + b"1]"
+    encoded = encode_body(body, "gzip", gzip_min_bytes=len(body))
+
+    assert encoded["headers"] == {"Content-Encoding": "gzip"}
+    assert encoded["isBase64Encoded"] is True
+    assert gzip.decompress(base64.b64decode(encoded["body"])) == body
+
+
+def test_encode_body_does_not_compress_when_gzip_is_not_accepted():
+    encoded = encode_body(b"[1,2,3]", "br", gzip_min_bytes=1)
+
+    assert encoded["isBase64Encoded"] is False
+
+
+def test_encode_body_response_limit_boundary():
+    largest = b"a" * (LAMBDA_RESPONSE_LIMIT_BYTES - RESPONSE_OVERHEAD_BYTES)
+    assert encode_body(largest)["body"] == largest.decode()
+
+    with pytest.raises(ResponseTooLargeError, match="Accept-Encoding: gzip"):
+        encode_body(largest + b"a")
+
+
+def test_encode_body_counts_escaped_characters_towards_the_limit():
+    body = b'"' * (LAMBDA_RESPONSE_LIMIT_BYTES // 2)
+    with pytest.raises(ResponseTooLargeError):
+        encode_body(body)
+
+    body = "é".encode("utf-8") * (LAMBDA_RESPONSE_LIMIT_BYTES // 4)
+    with pytest.raises(ResponseTooLargeError):
+        encode_body(body)
+
+
+def test_encode_body_rejects_compressed_bodies_over_the_limit():
+    body = os.urandom(LAMBDA_RESPONSE_LIMIT_BYTES)
+    with pytest.raises(ResponseTooLargeError, match="gzip-compressed"):
+        encode_body(body, "gzip", gzip_min_bytes=1)
+
+
+@pytest.mark.parametrize("name", list(SERIALIZERS))
+def test_dumps_result_splices_raw_json(name):
+    pytest.importorskip(name)
+    output = {"rows": [{"id": 1, "name": "é"}], "ok": True}
+    result = {"stdout": "hi", "output": RawJSON(json.dumps(output).encode()), "error": None}
+
+    encoded = get_serializer(name).dumps_result(result)
+
+    assert json.loads(encoded) == {"stdout": "hi", "output": output, "error": None}
+
+
+def test_get_serializer_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        get_serializer("yaml")
+
+
+def test_orjson_falls_back_to_stdlib():
+    pytest.importorskip("orjson")
+    serializer = get_serializer("orjson")
+
+    assert serializer.loads("[18446744073709551617]") == [2 ** 64 + 1]
+    assert serializer.loads(b"[-9223372036854775809]") == [-2 ** 63 - 1]
+    assert math.isnan(serializer.loads("[NaN]")[0])
+    assert serializer.loads(b"[-Infinity]") == [-math.inf]
+    assert serializer.loads("[1e400]") == [math.inf]
+    assert serializer.loads('["\\ud800"]') == ["\ud800"]
+    assert json.loads(serializer.dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+    assert json.loads(serializer.dumps({1: "a"})) == {"1": "a"}
+
+
+@pytest.mark.parametrize("value", ["ujson", "orjson "])
+def test_get_serializer_ignores_unsupported_env_serializers(monkeypatch, value):
+    monkeypatch.delenv("AVM_SERIALIZER", raising=False)
+    default = type(get_serializer())
+    monkeypatch.setenv("AVM_SERIALIZER", value)
+
+    assert type(get_serializer()) is default
+
+
+def test_get_serializer_uses_the_env_serializer(monkeypatch):
+    monkeypatch.setenv("AVM_SERIALIZER", "JSON")
+
+    assert type(get_serializer()) is SERIALIZERS["json"]
+
+
+def test_orjson_does_not_reparse_invalid_json(monkeypatch):
+    orjson = pytest.importorskip("orjson")
+    serializer = get_serializer("orjson")
+
+    def stdlib_loads(data):
+        raise AssertionError("parsed twice")
+
+    monkeypatch.setattr(json, "loads", stdlib_loads)
+    with pytest.raises(orjson.JSONDecodeError):
+        serializer.loads(b'{"code": ' + b"1," * 1000)
+    with pytest.raises(json.JSONDecodeError):
+        serializer.loads("[1,]")